@@ -3,10 +3,561 @@ Original by Al Sweigart al@inventwithpython.com
 Enhanced with Tkinter GUI and exception handling
 """
 
+import json
+import os
+import queue
 import random
+import sqlite3
+import threading
+import time
 import tkinter as tk
+import uuid
+from array import array
+from collections import deque
 from tkinter import messagebox, scrolledtext, ttk
-from typing import Dict, List
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Goal targets for SolutionTable: the amount may sit in any single bucket
+# (same rule as check_win), in one specific bucket key, or in all buckets total
+ANY_BUCKET = "any"
+TOTAL = "total"
+
+
+class SolutionTable:
+    """Shortest solutions to every reachable goal of one bucket configuration
+
+    Built by a single breadth-first sweep from the all-empty state. Every
+    state is packed into one integer (mixed radix over the bucket sizes) and
+    the search tree is kept as two flat arrays: the predecessor state and
+    the move that led there. Any goal's solution is rebuilt by walking the
+    predecessors back to the start, so a lookup costs O(path length).
+    """
+
+    def __init__(self, bucket_sizes: Dict[str, int]):
+        """Run the sweep for a bucket configuration
+
+        Args:
+            bucket_sizes: Mapping of bucket key to capacity, like
+                WaterBucketGUI.bucket_sizes
+        """
+        if not bucket_sizes:
+            raise ValueError("Minimal satu ember dibutuhkan")
+        for key, size in bucket_sizes.items():
+            if not isinstance(size, int) or size <= 0:
+                raise ValueError(f"Ukuran ember tidak valid: {key}={size}")
+
+        self.bucket_sizes = dict(bucket_sizes)
+        self.keys = sorted(bucket_sizes, key=lambda k: bucket_sizes[k], reverse=True)
+        self.sizes = [bucket_sizes[k] for k in self.keys]
+
+        self.strides = []
+        stride = 1
+        for size in self.sizes:
+            self.strides.append(stride)
+            stride *= size + 1
+        self.state_count = stride
+
+        # Same order as the buttons: fill, empty, then every src -> dst pour
+        count = len(self.keys)
+        self.moves: List[Tuple[str, ...]] = []
+        for key in self.keys:
+            self.moves.append(("fill", key))
+        for key in self.keys:
+            self.moves.append(("empty", key))
+        for src in range(count):
+            for dst in range(count):
+                if src != dst:
+                    self.moves.append(("pour", self.keys[src], self.keys[dst]))
+
+        # -1 marks an unreached state; the start state is its own predecessor
+        self.predecessor = array("l", [-1]) * self.state_count
+        self.move_code = array("H", [0]) * self.state_count
+        self.depth = array("l", [-1]) * self.state_count
+
+        # (target, amount) -> packed state of its first (shortest) solution
+        self.goals: Dict[Tuple[str, int], int] = {}
+        self._by_depth: Optional[Dict[int, List[Tuple[str, int]]]] = None
+
+        self._sweep()
+
+    def _unpack(self, state: int) -> List[int]:
+        """Split a packed state into per-bucket amounts"""
+        amounts = []
+        for size in self.sizes:
+            amounts.append(state % (size + 1))
+            state //= size + 1
+        return amounts
+
+    def _record_goals(self, state: int, amounts: List[int]):
+        """Register every goal satisfied by a newly reached state"""
+        goals = self.goals
+        for key, amount in zip(self.keys, amounts):
+            goals.setdefault((key, amount), state)
+            goals.setdefault((ANY_BUCKET, amount), state)
+        goals.setdefault((TOTAL, sum(amounts)), state)
+
+    def _sweep(self):
+        """Breadth-first search over all states reachable from empty"""
+        sizes = self.sizes
+        strides = self.strides
+        count = len(sizes)
+        predecessor = self.predecessor
+        move_code = self.move_code
+        depth = self.depth
+
+        predecessor[0] = 0
+        depth[0] = 0
+        self._record_goals(0, [0] * count)
+        queue = deque([0])
+
+        while queue:
+            state = queue.popleft()
+            amounts = self._unpack(state)
+            next_depth = depth[state] + 1
+            code = 0
+
+            candidates = []
+            for i in range(count):
+                # Fill (no-op when already full, like fill_bucket)
+                if amounts[i] < sizes[i]:
+                    candidates.append(
+                        (state + (sizes[i] - amounts[i]) * strides[i], code)
+                    )
+                code += 1
+            for i in range(count):
+                # Empty (no-op when already empty, like empty_bucket)
+                if amounts[i] > 0:
+                    candidates.append((state - amounts[i] * strides[i], code))
+                code += 1
+            for src in range(count):
+                for dst in range(count):
+                    if src == dst:
+                        continue
+                    poured = min(amounts[src], sizes[dst] - amounts[dst])
+                    if poured > 0:
+                        candidates.append(
+                            (
+                                state - poured * strides[src] + poured * strides[dst],
+                                code,
+                            )
+                        )
+                    code += 1
+
+            for nxt, move in candidates:
+                if depth[nxt] != -1:
+                    continue
+                predecessor[nxt] = state
+                move_code[nxt] = move
+                depth[nxt] = next_depth
+                self._record_goals(nxt, self._unpack(nxt))
+                queue.append(nxt)
+
+    def _check_target(self, target: str):
+        """Reject targets that are neither a bucket key nor a sentinel"""
+        if target not in (ANY_BUCKET, TOTAL) and target not in self.bucket_sizes:
+            raise ValueError(f"Target tidak valid: {target}")
+
+    def is_reachable(self, amount: int, target: str = ANY_BUCKET) -> bool:
+        """Whether the goal can be reached at all"""
+        self._check_target(target)
+        return (target, amount) in self.goals
+
+    def moves_needed(self, amount: int, target: str = ANY_BUCKET) -> Optional[int]:
+        """Minimum number of moves for a goal, or None if unreachable"""
+        self._check_target(target)
+        state = self.goals.get((target, amount))
+        return None if state is None else self.depth[state]
+
+    def states(self, amount: int, target: str = ANY_BUCKET) -> List[Dict[str, int]]:
+        """Bucket contents after each move of the shortest solution
+
+        Returns:
+            List starting with the empty state, or [] if unreachable
+        """
+        self._check_target(target)
+        state = self.goals.get((target, amount))
+        if state is None:
+            return []
+
+        chain = [state]
+        while state != 0:
+            state = self.predecessor[state]
+            chain.append(state)
+        chain.reverse()
+        return [dict(zip(self.keys, self._unpack(s))) for s in chain]
+
+    def path(self, amount: int, target: str = ANY_BUCKET) -> List[Tuple[str, ...]]:
+        """Moves of the shortest solution for a goal
+
+        Moves are ("fill", key), ("empty", key) or ("pour", src, dst), using
+        the same bucket keys as the GUI.
+
+        Returns:
+            List of moves, or [] if the goal is unreachable or already met
+        """
+        self._check_target(target)
+        state = self.goals.get((target, amount))
+        if state is None:
+            return []
+
+        moves = []
+        while state != 0:
+            moves.append(self.moves[self.move_code[state]])
+            state = self.predecessor[state]
+        moves.reverse()
+        return moves
+
+    def goals_at_depth(
+        self, moves: int, target: Optional[str] = None
+    ) -> List[Tuple[str, int]]:
+        """All goals whose shortest solution takes exactly `moves` moves
+
+        Args:
+            moves: Exact number of moves
+            target: Only return goals for this target (default: all targets)
+
+        Returns:
+            Sorted list of (target, amount) goals
+        """
+        if target is not None:
+            self._check_target(target)
+
+        if self._by_depth is None:
+            by_depth: Dict[int, List[Tuple[str, int]]] = {}
+            for goal, state in self.goals.items():
+                by_depth.setdefault(self.depth[state], []).append(goal)
+            for goals in by_depth.values():
+                goals.sort()
+            self._by_depth = by_depth
+
+        goals = self._by_depth.get(moves, [])
+        if target is None:
+            return list(goals)
+        return [goal for goal in goals if goal[0] == target]
+
+    def max_depth(self) -> int:
+        """Number of moves needed by the hardest reachable goal"""
+        return max(self.depth[state] for state in self.goals.values())
+
+
+DEFAULT_STATS_PATH = os.path.join(os.path.expanduser("~"), ".waterbucket_stats.db")
+
+_STATS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    config TEXT NOT NULL,
+    difficulty TEXT,
+    goal INTEGER NOT NULL,
+    steps INTEGER NOT NULL,
+    solved INTEGER NOT NULL,
+    started_at REAL NOT NULL,
+    ended_at REAL NOT NULL,
+    history TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_config_steps
+    ON sessions (config, solved, steps);
+CREATE TABLE IF NOT EXISTS moves (
+    session_id TEXT NOT NULL,
+    move_no INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    elapsed REAL NOT NULL,
+    PRIMARY KEY (session_id, move_no)
+);
+CREATE TABLE IF NOT EXISTS best_scores (
+    config TEXT PRIMARY KEY,
+    steps INTEGER NOT NULL,
+    session_id TEXT NOT NULL,
+    achieved_at REAL NOT NULL
+);
+"""
+
+_INSERT_SESSION = (
+    "INSERT OR REPLACE INTO sessions (session_id, config, difficulty, goal, "
+    "steps, solved, started_at, ended_at, history) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+_INSERT_MOVE = (
+    "INSERT OR REPLACE INTO moves (session_id, move_no, action, elapsed) "
+    "VALUES (?, ?, ?, ?)"
+)
+_UPSERT_BEST = (
+    "INSERT INTO best_scores (config, steps, session_id, achieved_at) "
+    "VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (config) DO UPDATE SET steps = excluded.steps, "
+    "session_id = excluded.session_id, achieved_at = excluded.achieved_at "
+    "WHERE excluded.steps < best_scores.steps"
+)
+# Bare columns next to MIN() come from the minimum row in SQLite
+_REBUILD_BEST = (
+    "INSERT INTO best_scores (config, steps, session_id, achieved_at) "
+    "SELECT config, MIN(steps), session_id, ended_at FROM sessions "
+    "WHERE solved = 1 GROUP BY config "
+    "ON CONFLICT (config) DO UPDATE SET steps = excluded.steps, "
+    "session_id = excluded.session_id, achieved_at = excluded.achieved_at "
+    "WHERE excluded.steps < best_scores.steps"
+)
+
+
+def config_key(bucket_sizes: Dict[str, int], goal: int) -> str:
+    """Identify a bucket configuration, e.g. 8-5-3:4 for the easy preset"""
+    sizes = sorted(bucket_sizes.values(), reverse=True)
+    return "-".join(str(size) for size in sizes) + f":{goal}"
+
+
+class StatsStore:
+    """Local SQLite storage for session results, move timings and best scores
+
+    The database runs in WAL mode so reads never block on the writer. All
+    writes are queued and applied by one background thread, which groups
+    whatever is waiting into a single transaction; callers (the Tkinter
+    event loop) only pay for a queue put.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_STATS_PATH,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+    ):
+        """Open (or create) the database and start the writer thread
+
+        Args:
+            path: SQLite database file
+            batch_size: Maximum queued writes committed in one transaction
+            flush_interval: Seconds the writer waits for more work
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue()
+
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_STATS_SCHEMA)
+        finally:
+            conn.close()
+
+        self._writer = threading.Thread(
+            target=self._write_loop, name="StatsStoreWriter", daemon=True
+        )
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the pragmas every user of the file needs"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _write_loop(self):
+        """Background thread: drain the queue in batches until closed"""
+        conn = self._connect()
+        running = True
+        try:
+            while running:
+                try:
+                    first = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+
+                batch = [first]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                # Keep statement order so a best score follows its session
+                grouped: List[Tuple[str, List[tuple]]] = []
+                for item in batch:
+                    if item is None:
+                        running = False
+                        continue
+                    sql, params = item
+                    if grouped and grouped[-1][0] == sql:
+                        grouped[-1][1].append(params)
+                    else:
+                        grouped.append((sql, [params]))
+
+                try:
+                    with conn:
+                        for sql, rows in grouped:
+                            conn.executemany(sql, rows)
+                except sqlite3.Error as e:
+                    print(f"Error writing statistics: {e}")
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        finally:
+            conn.close()
+
+    def record_move(self, session_id: str, move_no: int, action: str, elapsed: float):
+        """Queue one move and the seconds since the previous move"""
+        self._queue.put((_INSERT_MOVE, (session_id, move_no, action, elapsed)))
+
+    def record_session(
+        self,
+        session_id: str,
+        bucket_sizes: Dict[str, int],
+        goal: int,
+        difficulty: Optional[str],
+        steps: int,
+        solved: bool,
+        started_at: float,
+        ended_at: float,
+        history: List[str],
+    ):
+        """Queue a finished session and, if solved, its best score update"""
+        config = config_key(bucket_sizes, goal)
+        self._queue.put(
+            (
+                _INSERT_SESSION,
+                (
+                    session_id,
+                    config,
+                    difficulty,
+                    goal,
+                    steps,
+                    int(solved),
+                    started_at,
+                    ended_at,
+                    json.dumps(history, ensure_ascii=False),
+                ),
+            )
+        )
+        if solved:
+            self._queue.put((_UPSERT_BEST, (config, steps, session_id, ended_at)))
+
+    def flush(self):
+        """Block until every queued write has been committed"""
+        self._queue.join()
+
+    def close(self):
+        """Commit pending writes and stop the writer thread"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+    def import_sessions(self, sessions: Iterable[dict], chunk_size: int = 10000) -> int:
+        """Bulk-load replayed sessions in one transaction
+
+        Each session is a dict with the record_session fields (bucket_sizes,
+        goal, steps, solved, started_at, ended_at; session_id, difficulty and
+        history are optional) plus an optional "moves" list of
+        {"action", "elapsed"} dicts. Best scores are rebuilt once at the end
+        instead of per row.
+
+        Returns:
+            Number of sessions imported
+        """
+        self.flush()
+        count = 0
+        session_rows: List[tuple] = []
+        move_rows: List[tuple] = []
+
+        conn = self._connect()
+        try:
+            with conn:
+                for session in sessions:
+                    session_id = session.get("session_id") or uuid.uuid4().hex
+                    history = session.get("history", [])
+                    session_rows.append(
+                        (
+                            session_id,
+                            config_key(session["bucket_sizes"], session["goal"]),
+                            session.get("difficulty"),
+                            session["goal"],
+                            session["steps"],
+                            int(bool(session["solved"])),
+                            session["started_at"],
+                            session["ended_at"],
+                            json.dumps(history, ensure_ascii=False),
+                        )
+                    )
+                    for move_no, move in enumerate(session.get("moves", ()), 1):
+                        move_rows.append(
+                            (session_id, move_no, move["action"], move["elapsed"])
+                        )
+                    count += 1
+
+                    if len(session_rows) >= chunk_size:
+                        conn.executemany(_INSERT_SESSION, session_rows)
+                        conn.executemany(_INSERT_MOVE, move_rows)
+                        session_rows.clear()
+                        move_rows.clear()
+
+                conn.executemany(_INSERT_SESSION, session_rows)
+                conn.executemany(_INSERT_MOVE, move_rows)
+                conn.execute(_REBUILD_BEST)
+        finally:
+            conn.close()
+        return count
+
+    def import_replay_log(self, path: str) -> int:
+        """Bulk-load a JSON Lines replay log (one session dict per line)"""
+        with open(path, encoding="utf-8") as f:
+            return self.import_sessions(json.loads(line) for line in f if line.strip())
+
+    def best_score(self, config: str) -> Optional[int]:
+        """Fewest steps ever needed to solve a configuration"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT steps FROM best_scores WHERE config = ?", (config,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return None if row is None else row[0]
+
+    def leaderboard(self, config: str, limit: int = 10) -> List[Tuple[str, int, float]]:
+        """Best solved sessions for a configuration
+
+        Returns:
+            List of (session_id, steps, duration in seconds), fewest steps first
+        """
+        conn = self._connect()
+        try:
+            return conn.execute(
+                "SELECT session_id, steps, ended_at - started_at FROM sessions "
+                "WHERE config = ? AND solved = 1 "
+                "ORDER BY steps, ended_at - started_at LIMIT ?",
+                (config, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def step_percentiles(
+        self, config: str, percentiles: Iterable[float] = (50, 90)
+    ) -> Dict[float, Optional[int]]:
+        """Step counts of solved sessions at the given percentiles
+
+        Uses the nearest-rank method; each lookup is an index seek on
+        (config, solved, steps) rather than a full sort.
+        """
+        conn = self._connect()
+        try:
+            total = conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE config = ? AND solved = 1",
+                (config,),
+            ).fetchone()[0]
+
+            result: Dict[float, Optional[int]] = {}
+            for pct in percentiles:
+                if not 0 <= pct <= 100:
+                    raise ValueError(f"Persentil tidak valid: {pct}")
+                if total == 0:
+                    result[pct] = None
+                    continue
+                rank = max(1, -(-total * pct // 100))
+                row = conn.execute(
+                    "SELECT steps FROM sessions WHERE config = ? AND solved = 1 "
+                    "ORDER BY steps LIMIT 1 OFFSET ?",
+                    (config, int(rank) - 1),
+                ).fetchone()
+                result[pct] = row[0]
+            return result
+        finally:
+            conn.close()
 
 
 class WaterBucketGUI:
@@ -32,6 +583,15 @@ class WaterBucketGUI:
             self.history = []
             self.difficulty = "easy"
 
+            # Statistics
+            try:
+                self.stats = StatsStore()
+            except (sqlite3.Error, OSError) as e:
+                print(f"Statistics disabled: {e}")
+                self.stats = None
+            self.start_session()
+            self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
             # Colors - Improved contrast
             self.bg_color = "#F5F5F5"
             self.water_color = "#1976D2"
@@ -568,6 +1128,7 @@ class WaterBucketGUI:
         try:
             for size, amount in self.water_in_bucket.items():
                 if amount == self.goal:
+                    self.save_session(solved=True)
                     messagebox.showinfo(
                         "🎉 Selamat!",
                         f"Anda berhasil menyelesaikan puzzle!\n\n"
@@ -581,9 +1142,65 @@ class WaterBucketGUI:
             print(f"Error checking win: {e}")
             return False
 
+    def start_session(self):
+        """Begin a new statistics session for the current puzzle"""
+        self.session_id = uuid.uuid4().hex
+        self.session_started = time.time()
+        self.last_move_time = time.perf_counter()
+        self.session_saved = False
+
+    def save_session(self, solved):
+        """Queue the current session for the statistics database
+
+        Args:
+            solved: Whether the goal was reached
+        """
+        try:
+            if self.stats is None or self.session_saved:
+                return
+            if not solved and self.steps == 0:
+                return
+
+            self.stats.record_session(
+                self.session_id,
+                self.bucket_sizes,
+                self.goal,
+                self.difficulty,
+                self.steps,
+                solved,
+                self.session_started,
+                time.time(),
+                list(self.history),
+            )
+            self.session_saved = True
+
+        except Exception as e:
+            print(f"Error saving session: {e}")
+
+    def on_close(self):
+        """Save the unfinished session and close the window"""
+        try:
+            self.save_session(solved=False)
+            if self.stats is not None:
+                self.stats.close()
+        except Exception as e:
+            print(f"Error closing statistics: {e}")
+        finally:
+            self.root.destroy()
+
     def add_to_history(self, action):
         """Add action to history display"""
         try:
+            now = time.perf_counter()
+            if self.stats is not None and not self.session_saved:
+                self.stats.record_move(
+                    self.session_id,
+                    len(self.history) + 1,
+                    action,
+                    now - self.last_move_time,
+                )
+            self.last_move_time = now
+
             self.history.append(action)
             self.history_text.config(state="normal")
             self.history_text.insert("end", f"{len(self.history)}. {action}\n")
@@ -607,11 +1224,13 @@ class WaterBucketGUI:
         """Reset the game to initial state"""
         try:
             if messagebox.askyesno("Reset", "Yakin ingin reset permainan?"):
+                self.save_session(solved=False)
                 for key in self.water_in_bucket:
                     self.water_in_bucket[key] = 0
 
                 self.steps = 0
                 self.history.clear()
+                self.start_session()
 
                 self.history_text.config(state="normal")
                 self.history_text.delete(1.0, "end")
@@ -635,11 +1254,13 @@ class WaterBucketGUI:
             if difficulty not in difficulties:
                 raise ValueError(f"Invalid difficulty: {difficulty}")
 
+            self.save_session(solved=False)
             self.bucket_sizes, self.goal = difficulties[difficulty]
             self.water_in_bucket = {k: 0 for k in self.bucket_sizes.keys()}
             self.difficulty = difficulty
             self.steps = 0
             self.history.clear()
+            self.start_session()
 
             self.history_text.config(state="normal")
             self.history_text.delete(1.0, "end")